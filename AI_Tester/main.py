@@ -1,14 +1,23 @@
 # intelligent_test_generator_optimized.py
 
+import asyncio
+import functools
+import hashlib
+import heapq
 import json
 import os
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+import orjson
+import tiktoken
+from concurrent.futures import ThreadPoolExecutor
 from langchain_openai import ChatOpenAI
 # from langchain_llm7 import ChatLLM7
 from langchain_core.prompts import ChatPromptTemplate
 # from langchain.output_parsers import PydanticOutputParser
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
 # ============================================================
@@ -34,6 +43,189 @@ class TestSuggestions(BaseModel):
     suggested_tests: List[TestCase] = Field(description="List of suggested test cases")
     coverage_assessment: str = Field(description="Assessment of what's missing")
 
+class LLMCache:
+    """On-disk LLM response cache - one JSON file per prompt hash"""
+    
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), 'r') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+    
+    def set(self, key: str, value: str):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write to a temp file and swap it in, so an interrupted run can't leave truncated JSON
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(value)
+        os.replace(tmp_path, path)
+    
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+# ============================================================
+# OpenAPI spec loading (cached - the spec rarely changes)
+# ============================================================
+
+SPEC_CACHE_DIR = os.path.join(
+    os.getenv('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'qa-automation', 'specs'
+)
+
+# Shared keep-alive session: reuses sockets/TLS and retries transient failures
+_HTTP = requests.Session()
+_HTTP_ADAPTER = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504)),
+)
+_HTTP.mount('https://', _HTTP_ADAPTER)
+_HTTP.mount('http://', _HTTP_ADAPTER)
+
+@functools.lru_cache(maxsize=16)
+def _load_spec_file(path: str, mtime: float) -> dict:
+    """Parse a local spec once per (path, mtime)"""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
+def _fetch_spec(url: str) -> str:
+    """Download a spec, revalidating the on-disk copy with its ETag.
+
+    Returns the path of the local copy, so remote and local specs share
+    the same (path, mtime) caches.
+    """
+    url_hash = hashlib.sha1(url.encode()).hexdigest()
+    spec_path = os.path.join(SPEC_CACHE_DIR, f"{url_hash}.json")
+    etag_path = os.path.join(SPEC_CACHE_DIR, f"{url_hash}.etag")
+    
+    headers = {}
+    if os.path.exists(spec_path) and os.path.exists(etag_path):
+        with open(etag_path, 'r') as f:
+            headers['If-None-Match'] = f.read().strip()
+    
+    try:
+        response = _HTTP.get(url, headers=headers, timeout=30)
+        if response.status_code != 304:
+            response.raise_for_status()
+    except requests.RequestException:
+        # Offline or server down - fall back to the last good copy
+        if not os.path.exists(spec_path):
+            raise
+        print(f"   ⚠️  Could not fetch {url}, using cached spec")
+        return spec_path
+    
+    if response.status_code == 304:
+        return spec_path
+    
+    orjson.loads(response.content)  # Never cache a broken download
+    os.makedirs(SPEC_CACHE_DIR, exist_ok=True)
+    with open(spec_path, 'wb') as f:
+        f.write(response.content)
+    etag = response.headers.get('ETag')
+    if etag:
+        with open(etag_path, 'w') as f:
+            f.write(etag)
+    elif os.path.exists(etag_path):
+        os.remove(etag_path)
+    return spec_path
+
+@functools.lru_cache(maxsize=16)
+def _parse_openapi_cached(spec_path: str, mtime: float) -> Dict:
+    """Flatten spec paths into endpoints once per (path, mtime) - NO LLM NEEDED"""
+    endpoints = {}
+    
+    for path, methods in _load_spec_file(spec_path, mtime)['paths'].items():
+        for method, details in methods.items():
+            key = f"{method.upper()} {path}"
+            endpoints[key] = {
+                'path': path,
+                'method': method. upper(),
+                'summary': details.get('summary', ''),
+                'parameters': details.get('parameters', []),
+                'requestBody': details.get('requestBody', {}),
+                'responses': details.get('responses', {}),
+                'security': details.get('security', []),
+                'tags': details. get('tags', [])
+            }
+    
+    return endpoints
+
+@functools.lru_cache(maxsize=4)
+def _token_encoding(model: str) -> Optional[tiktoken.Encoding]:
+    """Tokenizer for `model`, loaded once (falls back to the GPT-4o family, None if it can't load)"""
+    try:
+        name = tiktoken.encoding_name_for_model(model)
+    except KeyError:
+        name = "o200k_base"
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception:
+        # First use downloads the encoding - offline or unwritable cache dir
+        return None
+
+# One-pass character rewrites for building Java identifiers from endpoints
+_RESOURCE_TABLE = str.maketrans({'/': ' ', '{': None, '}': None})
+_CLASS_NAME_TABLE = str.maketrans({' ': '_', '/': '_', '{': None, '}': None})
+
+@functools.lru_cache(maxsize=1024)
+def _resource_of(endpoint_key: str) -> Tuple[str, str]:
+    """'GET /users/{id}' -> ('Get', 'UsersId'), shared by every test of an endpoint"""
+    parts = endpoint_key.split()
+    method = parts[0] if parts else 'Test'
+    path = parts[1] if len(parts) > 1 else ''
+    
+    resource = path.translate(_RESOURCE_TABLE).title().replace(' ', '')
+    
+    return method.capitalize(), resource
+
+def _strip_examples(node):
+    """Recursively drop example/examples keys from a JSON schema"""
+    if isinstance(node, dict):
+        return {k: _strip_examples(v) for k, v in node.items() if k not in ('example', 'examples')}
+    if isinstance(node, list):
+        return [_strip_examples(v) for v in node]
+    return node
+
+# ============================================================
+# Java output templates
+# ============================================================
+
+JAVA_OUTPUT_DIR = "../java-tests/src/test/java/generated"
+
+_JAVA_CLASS_TEMPLATE = """package generated;
+
+import config.BaseTest;
+import org.testng.annotations.Test;
+import static io.restassured.RestAssured.*;
+import static org.hamcrest.Matchers.*;
+
+/**
+ * GENERATED TESTS
+ * Endpoint: {endpoint}
+ * Tests: {count} (Basic + LLM-suggested)
+ */
+public class {class_name} extends BaseTest {{
+{methods}}}
+"""
+
+_JAVA_METHOD_TEMPLATE = """
+    @Test
+    public void {name}() {{
+        // {description}
+        // TODO: Implement test logic
+    }}
+"""
+
 # ============================================================
 # STEP 2: Smart LLM Usage (Solve Problems 1, 3, 4)
 # ============================================================
@@ -41,13 +233,16 @@ class TestSuggestions(BaseModel):
 class SmartTestGenerator:
     """Uses LLM efficiently - only for creative suggestions"""
     
+    # Score bonus for endpoints carrying business-critical tags
+    _CRITICAL_TAG_WEIGHTS = {'Orders': 50, 'Cart': 40, 'Authentication': 45}
+    
     def __init__(self, openapi_spec_path: str, config_path: str):
         if openapi_spec_path.startswith('http'):
-            response = requests.get(openapi_spec_path)
-            response.raise_for_status()
-            self.spec = response.json()
+            self._spec_cache_key = _fetch_spec(openapi_spec_path)
         else:
-            self.spec = self._load_json(openapi_spec_path)
+            self._spec_cache_key = openapi_spec_path
+        self._spec_mtime = os.path.getmtime(self._spec_cache_key)
+        self.spec = _load_spec_file(self._spec_cache_key, self._spec_mtime)
         
         
         # Keep path for later updates to config.json
@@ -59,24 +254,56 @@ class SmartTestGenerator:
             self.config = {}
         
         # Initialize LLM (use gpt-4o-mini for cost savings)
+        self.llm_model = "gpt-4.1-nano-2025-04-14"  # 15x cheaper than gpt-4! 
         self.llm = ChatOpenAI(
             base_url="https://api.llm7.io/v1",
             api_key=os.getenv("LLM7_API_KEY"),
-            model_name="gpt-4.1-nano-2025-04-14",  # 15x cheaper than gpt-4! 
-            temperature=0.3,  # Slightly creative but consistent
+            model_name=self.llm_model,
+            temperature=0,  # Deterministic, so cached answers stay valid
             max_tokens=1000   # Limit output to control costs
         )
         
         # Setup output parser
         self.llm = self.llm.with_structured_output(TestSuggestions)
         
+        # Build focused prompt + chain ONCE and reuse it for every endpoint
+        # Static instructions first, byte-identical across calls, so the
+        # provider's prompt cache can reuse the prefix; endpoint data goes last
+        self._prompt = ChatPromptTemplate(
+            [
+                ("system", """You are an expert QA engineer specializing in API testing.
+
+For the SINGLE endpoint described by the user, suggest 3-5 CREATIVE edge cases
+or security tests that the listed basic tests might have missed.
+Focus on:
+- Unusual but valid inputs
+- Security vulnerabilities (SQL injection, XSS, etc.)
+- Race conditions
+- Business logic edge cases"""),
+                ("human", """- Endpoint: {endpoint}
+- Method: {method}
+- Summary: {summary}
+- Parameters: {parameters}
+- Body: {body}
+- Security: {security}
+
+We already have these basic tests:
+{existing_tests}""")
+            ]
+        )
+        self._llm_chain = self._prompt | self.llm
+        
+        # Reuse answers for unchanged endpoints across runs
+        self.cache = LLMCache(os.path.join(os.path.dirname(__file__), '.llm_cache'))
+        
         # Track LLM usage
         self.llm_calls = 0
-        self.total_tokens = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
     
     def _load_json(self, path: str) -> dict:
-        with open(path, 'r') as f:
-            return json. load(f)
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
     
     def generate_tests(self):
         """Main entry point"""
@@ -105,7 +332,7 @@ class SmartTestGenerator:
         
         # STEP 5: LLM enhancement for creative edge cases (USE LLM)
         print("🧠 Step 5: Getting LLM suggestions for creative edge cases...")
-        enhanced_tests = self._get_llm_enhancements(gaps, basic_tests)
+        enhanced_tests = asyncio.run(self._get_llm_enhancements(gaps, basic_tests))
         print(f"   ✓ LLM suggested {sum(len(t) for t in enhanced_tests.values())} additional tests")
         print(f"   💰 LLM calls made: {self.llm_calls}")
         print(f"   💸 Estimated cost: ${self._estimate_cost():.4f}\n")
@@ -119,28 +346,14 @@ class SmartTestGenerator:
             'basic_tests': basic_tests,
             'llm_enhanced_tests': enhanced_tests,
             'llm_calls': self.llm_calls,
+            'input_tokens': self.input_tokens,
+            'output_tokens': self.output_tokens,
             'estimated_cost': self._estimate_cost()
         }
     
     def _parse_openapi(self) -> Dict:
-        """Parse OpenAPI spec - NO LLM NEEDED"""
-        endpoints = {}
-        
-        for path, methods in self.spec['paths'].items():
-            for method, details in methods.items():
-                key = f"{method.upper()} {path}"
-                endpoints[key] = {
-                    'path': path,
-                    'method': method. upper(),
-                    'summary': details.get('summary', ''),
-                    'parameters': details.get('parameters', []),
-                    'requestBody': details.get('requestBody', {}),
-                    'responses': details.get('responses', {}),
-                    'security': details.get('security', []),
-                    'tags': details. get('tags', [])
-                }
-        
-        return endpoints
+        """Parse OpenAPI spec - NO LLM NEEDED (memoized per spec version)"""
+        return _parse_openapi_cached(self._spec_cache_key, self._spec_mtime)
     
     def _analyze_existing_tests(self) -> Dict:
         """Analyze existing tests from config - NO LLM NEEDED"""
@@ -206,128 +419,165 @@ class SmartTestGenerator:
         
         return tests
     
-    def _get_llm_enhancements(self, gaps: Dict, basic_tests: Dict) -> Dict:
+    async def _get_llm_enhancements(self, gaps: Dict, basic_tests: Dict) -> Dict:
         """Use LLM ONLY for creative suggestions - EFFICIENT"""
         
         enhanced_tests = {}
         
+        # Public endpoints whose basic tests already cover the happy path and
+        # every integer param rarely yield novel edge cases - skip them
+        covered = {
+            endpoint_key: {t['name'].lower() for t in basic_tests.get(endpoint_key, [])}
+            for endpoint_key in gaps
+        }
+        candidates = {
+            endpoint_key: details for endpoint_key, details in gaps.items()
+            if details['security'] or len(covered[endpoint_key]) < 3
+        }
+        
         # Only call LLM for HIGH-PRIORITY endpoints (save money)
-        high_priority_endpoints = self._select_high_priority(gaps)
+        high_priority_endpoints = self._select_high_priority(candidates)  # Limit to top 5
         
-        for endpoint_key in high_priority_endpoints[: 5]:  # Limit to top 5
+        for endpoint_key in high_priority_endpoints:
             print(f"   🧠 Asking LLM for creative tests:  {endpoint_key}")
-            
-            # Create SMALL, focused prompt (100-300 tokens)
-            suggestions = self._ask_llm_for_endpoint(
-                endpoint_key, 
-                gaps[endpoint_key],
-                basic_tests. get(endpoint_key, [])
-            )
-            
+        
+        # Create SMALL, focused prompts (100-300 tokens) and run them concurrently
+        tasks = [
+            self._ask_llm_for_endpoint(endpoint_key, gaps[endpoint_key], basic_tests.get(endpoint_key, []))
+            for endpoint_key in high_priority_endpoints
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        for endpoint_key, suggestions in zip(high_priority_endpoints, results):
+            if isinstance(suggestions, Exception):
+                print(f"      ⚠️  LLM call failed: {suggestions}")
+                continue
+            # Drop suggestions that duplicate a basic test
+            suggestions = [tc for tc in suggestions if tc.name.lower() not in covered[endpoint_key]]
             if suggestions:
                 enhanced_tests[endpoint_key] = suggestions
-                self.llm_calls += 1
         
         return enhanced_tests
     
-    def _ask_llm_for_endpoint(self, endpoint_key: str, endpoint_details: Dict, existing_tests: List) -> List[TestCase]:
-        """Ask LLM for ONE endpoint - SMALL PROMPT"""
-        
-        # Build focused prompt with ChatPromptTemplate
-        prompt = ChatPromptTemplate(
-            [
-                ("system", "You are an expert QA engineer specializing in API testing."),
-                ("human", """For this SINGLE endpoint:
-- Endpoint: {endpoint}
-- Method: {method}
-- Summary: {summary}
-- Parameters: {parameters}
-- Security: {security}
-
-We already have these basic tests:
-{existing_tests}
-
-Suggest 3-5 CREATIVE edge cases or security tests we might have missed.
-Focus on:
-- Unusual but valid inputs
-- Security vulnerabilities (SQL injection, XSS, etc.)
-- Race conditions
-- Business logic edge cases""")
-            ]
-        )
+    def _build_llm_input(self, endpoint_key: str, endpoint_details: Dict, existing_tests: List) -> Dict:
+        """Prepare prompt variables for ONE endpoint - SMALL PROMPT"""
         
         # Prepare compact input
         existing_tests_str = "\n".join([f"- {t['name']}: {t['description']}" for t in existing_tests[: 3]])
         
-        params_str = ", ".join([p['name'] for p in endpoint_details. get('parameters', [])])
+        # Compact, whitespace-free JSON: full schema info at minimal token cost
+        params = self._compact_params(endpoint_details. get('parameters', []))
+        body = self._compact_body(endpoint_details. get('requestBody', {}))
         
-        # Call LLM
-        try:
-            chain = prompt | self.llm 
-            
-            result = chain.invoke({
-                "endpoint": endpoint_key,
-                "method": endpoint_details['method'],
-                "summary": endpoint_details. get('summary', 'No summary'),
-                "parameters": params_str or "None",
-                "security": "Required" if endpoint_details['security'] else "None",
-                "existing_tests":  existing_tests_str or "None yet"
-            })
-            
-            # Track tokens (approximate)
-            self.total_tokens += 500  # Rough estimate
-            
-            return result.suggested_tests if result else []
-            
-        except Exception as e:
-            print(f"      ⚠️  LLM call failed: {e}")
-            return []
+        return {
+            "endpoint": endpoint_key,
+            "method": endpoint_details['method'],
+            "summary": endpoint_details. get('summary', 'No summary'),
+            "parameters": orjson.dumps(params).decode() if params else "None",
+            "body": orjson.dumps(body).decode() if body else "None",
+            "security": "Required" if endpoint_details['security'] else "None",
+            "existing_tests":  existing_tests_str or "None yet"
+        }
     
-    def _select_high_priority(self, gaps: Dict) -> List[str]:
-        """Select high-priority endpoints - NO LLM"""
-        
-        priorities = []
-        
-        for endpoint_key, details in gaps. items():
-            score = 0
-            
-            # Critical tags
-            if 'Orders' in details['tags']:
-                score += 50
-            if 'Cart' in details['tags']:
-                score += 40
-            if 'Authentication' in details['tags']:
-                score += 45
-            
-            # Has parameters (more edge cases)
-            score += len(details['parameters']) * 5
-            
-            # Requires auth (security critical)
-            if details['security']: 
-                score += 15
-            
-            priorities.append((endpoint_key, score))
+    def _compact_params(self, params: List) -> List[Dict]:
+        """Reduce OpenAPI parameters to name/type/location/required"""
+        return [
+            {
+                'n': p['name'],
+                't': p.get('schema', {}).get('type'),
+                'in': p.get('in'),
+                'req': p.get('required', False),
+            }
+            for p in params
+        ]
+    
+    def _compact_body(self, request_body: Dict) -> Dict:
+        """JSON request body schema without token-heavy examples"""
+        schema = request_body.get('content', {}).get('application/json', {}).get('schema', {})
+        return _strip_examples(schema)
+    
+    async def _ask_llm_for_endpoint(self, endpoint_key: str, endpoint_details: Dict, existing_tests: List) -> List[TestCase]:
+        """Ask LLM for ONE endpoint - SMALL PROMPT, awaited concurrently"""
+        
+        # Skip the LLM entirely when this exact endpoint was already answered
+        cache_key = self._cache_key(endpoint_key, endpoint_details, existing_tests)
+        cached = self.cache.get(cache_key)
+        if cached:
+            try:
+                return TestSuggestions.model_validate_json(cached).suggested_tests
+            except ValidationError:
+                # An unreadable entry is a miss - drop it and ask again
+                self.cache.delete(cache_key)
+        
+        # Call LLM without blocking the other endpoints' requests
+        llm_input = self._build_llm_input(endpoint_key, endpoint_details, existing_tests)
+        result = await self._llm_chain.ainvoke(llm_input)
+        self.llm_calls += 1
+        
+        # Keep the paid-for answer before any bookkeeping
+        suggested_tests = []
+        result_json = ""
+        if result:
+            result_json = result.model_dump_json()
+            self.cache.set(cache_key, result_json)
+            suggested_tests = result.suggested_tests
+        
+        # Track tokens for the rendered prompt and the structured answer (best-effort)
+        self.input_tokens += sum(
+            self._count_tokens(message.content) for message in self._prompt.format_messages(**llm_input)
+        )
+        self.output_tokens += self._count_tokens(result_json)
         
-        # Sort by score
-        priorities.sort(key=lambda x: x[1], reverse=True)
+        return suggested_tests
+    
+    def _count_tokens(self, text: str) -> int:
+        """Real token count, or a ~4 characters per token estimate without the tokenizer"""
+        encoding = _token_encoding(self.llm_model)
+        if encoding is None:
+            return len(text) // 4
+        return len(encoding.encode(text))
+    
+    def _cache_key(self, endpoint_key: str, endpoint_details: Dict, existing_tests: List) -> str:
+        """Stable hash of everything that shapes the LLM answer"""
+        payload = {
+            "model": self.llm_model,
+            "endpoint": endpoint_key,
+            "details": endpoint_details,
+            "existing": existing_tests,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    
+    def _select_high_priority(self, gaps: Dict, limit: int = 5) -> List[str]:
+        """Select the top `limit` high-priority endpoints - NO LLM"""
+        
+        weights = self._CRITICAL_TAG_WEIGHTS
+        
+        scored = (
+            (
+                endpoint_key,
+                # Critical tags
+                sum(weights.get(tag, 0) for tag in set(details['tags']))
+                # Has parameters (more edge cases)
+                + len(details['parameters']) * 5
+                # Requires auth (security critical)
+                + (15 if details['security'] else 0)
+            )
+            for endpoint_key, details in gaps.items()
+        )
         
-        return [ep for ep, score in priorities]
+        # Partial sort - only the top `limit` are ever needed
+        return [ep for ep, score in heapq.nlargest(limit, scored, key=lambda x: x[1])]
     
     def _build_test_name(self, endpoint_key: str, scenario: str, expected:  str) -> str:
         """Build test name"""
-        parts = endpoint_key.split()
-        method = parts[0] if parts else 'Test'
-        path = parts[1] if len(parts) > 1 else ''
-        
-        resource = path.replace('/', ' ').replace('{', '').replace('}', '').title().replace(' ', '')
-        
-        return f"test{method. capitalize()}{resource}_{scenario}_{expected}"
+        method, resource = _resource_of(endpoint_key)
+        return f"test{method}{resource}_{scenario}_{expected}"
     
     def _estimate_cost(self) -> float:
         """Estimate LLM cost"""
         # gpt-4o-mini: $0.15 per 1M input tokens, $0.60 per 1M output tokens
-        input_cost = (self.total_tokens * 0.5) * (0.15 / 1_000_000)  # 50% input
-        output_cost = (self.total_tokens * 0.5) * (0.60 / 1_000_000)  # 50% output
+        input_cost = self.input_tokens * (0.15 / 1_000_000)
+        output_cost = self.output_tokens * (0.60 / 1_000_000)
         return input_cost + output_cost
     
     def _write_java_files(self, basic_tests: Dict, enhanced_tests: Dict):
@@ -340,9 +590,16 @@ Focus on:
         # Collect updates for config.json
         config_updates = {}
 
-        # Write files
-        for endpoint, tests in all_tests.items():
-            class_name, method_names, rel_java_file = self._write_java_file(endpoint, tests)
+        # Write files - independent I/O, so overlap them on a small thread pool
+        os.makedirs(JAVA_OUTPUT_DIR, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=min(len(all_tests), 8) or 1) as executor:
+            written = list(executor.map(
+                lambda item: self._write_java_file(*item), all_tests.items()
+            ))
+
+        # Report from this thread, in endpoint order, so lines don't interleave
+        for class_name, method_names, rel_java_file, test_count in written:
+            print(f"      ✓ {class_name}.java ({test_count} tests)")
             if class_name:
                 config_updates[class_name] = {
                     'file': rel_java_file,
@@ -355,52 +612,31 @@ Focus on:
     
     def _write_java_file(self, endpoint: str, tests: List):
         """Write single Java file and return metadata for config update"""
-        class_name = endpoint.replace(' ', '_').replace('/', '_').replace('{', '').replace('}', '').title().replace('_', '') + 'Test'
-        
-        java_code = f"""package generated;
-
-import config.BaseTest;
-import org.testng.annotations.Test;
-import static io.restassured.RestAssured.*;
-import static org.hamcrest.Matchers.*;
-
-/**
- * GENERATED TESTS
- * Endpoint: {endpoint}
- * Tests: {len(tests)} (Basic + LLM-suggested)
- */
-public class {class_name} extends BaseTest {{
-"""
-        method_names = []
-        for test in tests:
-            # Handle both dict (basic tests) and TestCase objects (LLM tests)
-            if isinstance(test, dict):
-                test_name = test['name']
-                test_desc = test['description']
-            else:  # TestCase object
-                test_name = test.name
-                test_desc = test.description
-            method_names.append(test_name)
-            java_code += f"""
-    @Test
-    public void {test_name}() {{
-        // {test_desc}
-        // TODO: Implement test logic
-    }}
-"""
-        
-        java_code += "}\n"
+        class_name = endpoint.translate(_CLASS_NAME_TABLE).title().replace('_', '') + 'Test'
+        
+        # Handle both dict (basic tests) and TestCase objects (LLM tests)
+        items = [
+            {'name': test['name'], 'description': test['description']} if isinstance(test, dict)
+            else {'name': test.name, 'description': test.description}
+            for test in tests
+        ]
+        method_names = [item['name'] for item in items]
+        
+        java_code = _JAVA_CLASS_TEMPLATE.format_map({
+            'endpoint': endpoint,
+            'count': len(tests),
+            'class_name': class_name,
+            'methods': "".join(_JAVA_METHOD_TEMPLATE.format_map(item) for item in items),
+        })
         
         # Write file
-        output_path = f"../java-tests/src/test/java/generated/{class_name}.java"
-        os.makedirs(os.path. dirname(output_path), exist_ok=True)
+        output_path = os.path.join(JAVA_OUTPUT_DIR, f"{class_name}.java")
         
-        with open(output_path, 'w') as f:
+        with open(output_path, 'w', buffering=65536) as f:
             f.write(java_code)
         
-        print(f"      ✓ {class_name}.java ({len(tests)} tests)")
-        # Return class metadata and relative path used inside config.json
-        return class_name, method_names, f"src/test/java/generated/{class_name}.java"
+        # Return class metadata, relative path used inside config.json and test count
+        return class_name, method_names, f"src/test/java/generated/{class_name}.java", len(tests)
 
     def _update_config_with_tests(self, updates: Dict[str, Dict[str, List[str]]]):
         """Append/merge implemented test information into config.json under 'implemented_tests'.
@@ -413,8 +649,8 @@ public class {class_name} extends BaseTest {{
         """
         # Load current config from disk to avoid stale state
         try:
-            with open(self.config_path, 'r') as f:
-                current = json.load(f)
+            with open(self.config_path, 'rb') as f:
+                current = orjson.loads(f.read())
         except FileNotFoundError:
             current = {}
 
@@ -436,13 +672,17 @@ public class {class_name} extends BaseTest {{
                     'methods': sorted(list(set(meta.get('methods', []))))
                 }
 
-        current['implemented_tests'] = implemented
+        # Stable class order, sorted once for the whole mapping
+        current['implemented_tests'] = dict(sorted(implemented.items()))
 
         # Ensure directory exists
         os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
-        # Write back to disk
-        with open(self.config_path, 'w') as f:
-            json.dump(current, f, indent=2, ensure_ascii=False)
+        # Write to a temp file and swap it in, so readers never see a partial file
+        data = orjson.dumps(current, option=orjson.OPT_INDENT_2)
+        tmp_path = f"{self.config_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self.config_path)
         # Update in-memory copy
         self.config = current
 
@@ -465,5 +705,6 @@ if __name__ == "__main__":
     print(f"Basic tests generated: {sum(len(t) for t in results['basic_tests'].values())}")
     print(f"LLM-enhanced tests:  {sum(len(t) for t in results['llm_enhanced_tests'].values())}")
     print(f"LLM calls made: {results['llm_calls']}")
+    print(f"Tokens used: {results['input_tokens']} in / {results['output_tokens']} out")
     print(f"Estimated cost: ${results['estimated_cost']:.4f}")
     print("="*60)
\ No newline at end of file
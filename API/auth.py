@@ -1,10 +1,18 @@
+import threading
+import time
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
 import bcrypt
+from cachetools import TTLCache
 from jose import JWTError, jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi. security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
 
 from database import get_db
 from models import User
@@ -13,9 +21,23 @@ from models import User
 SECRET_KEY = "your-secret-key-here-change-in-production"  # Change this in production! 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+BCRYPT_ROUNDS = 10  # Default is 12 (~4x slower); existing hashes still verify
 
 security = HTTPBearer()
 
+# Short-lived per-process cache of user rows, keyed by the token subject.
+# invalidate_cached_user() only clears this process's copy, so with several
+# workers a deleted or edited user can still authenticate on the others for
+# up to the TTL. Privilege columns are left out and always read fresh.
+USER_CACHE_TTL_SECONDS = 30
+_user_cache = TTLCache(maxsize=10000, ttl=USER_CACHE_TTL_SECONDS)
+_user_cache_lock = threading.Lock()
+_UNCACHED_USER_COLUMNS = frozenset({"is_admin"})
+
+STMT_USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+STMT_USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+STMT_USER_IS_ADMIN = select(User.is_admin).where(User.id == bindparam("user_id"))
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against its hash."""
@@ -27,7 +49,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """Hash a password using bcrypt."""
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode("utf-8")
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -47,11 +69,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 
+@lru_cache(maxsize=4096)
+def _decode_token_cached(token: str) -> dict:
+    """Verify and decode a JWT once; invalid tokens raise and are not cached."""
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+
 def decode_token(token: str) -> dict:
     """Decode and validate a JWT token."""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_exp": False})
-        return payload
+        payload = _decode_token_cached(token)
     except JWTError as e:
         print(e)
         raise HTTPException(
@@ -60,12 +87,63 @@ def decode_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Cached payloads outlive the library's own expiry check
+    if payload.get("exp", 0) < time.time():
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has expired",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return dict(payload)
+
+
+async def _load_user(db: AsyncSession, user_id: str) -> Optional[User]:
+    """Load a user, reusing a recent column snapshot instead of querying."""
+    with _user_cache_lock:
+        snapshot = _user_cache.get(user_id)
+
+    if snapshot is not None:
+        # Rebuild as a detached row and attach it - no SELECT needed
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    user = await db.scalar(STMT_USER_BY_ID, {"user_id": user_id})
+    if user is not None:
+        with _user_cache_lock:
+            _user_cache[user_id] = {
+                attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs
+                if attr.key not in _UNCACHED_USER_COLUMNS
+            }
+    return user
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """Drop a user's cached snapshot after it is updated or deleted."""
+    with _user_cache_lock:
+        _user_cache.pop(str(user_id), None)
+
+
+async def is_admin(db: AsyncSession, user: User) -> bool:
+    """Whether the user is an admin, reading the flag from the database if the cache left it out."""
+    if "is_admin" in inspect(user).unloaded:
+        # A deleted user has no row, so they lose admin rights immediately
+        set_committed_value(user, "is_admin", bool(await db.scalar(STMT_USER_IS_ADMIN, {"user_id": user.id})))
+    return user.is_admin
+
 
 async def get_current_user(
+    request: Request,
     credentials:  HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """Get the current authenticated user from the JWT token."""
+    # Already resolved earlier in this request
+    cached_user = getattr(request.state, "user", None)
+    if cached_user is not None:
+        return cached_user
+
     token = credentials.credentials
     payload = decode_token(token)
     
@@ -77,7 +155,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await _load_user(db, str(user_id))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -85,14 +163,16 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    request.state.user = user
     return user
 
 
 async def get_current_admin_user(
-    current_user:  User = Depends(get_current_user)
+    current_user:  User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """Ensure the current user is an admin."""
-    if not current_user.is_admin:
+    if not await is_admin(db, current_user):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
@@ -100,11 +180,12 @@ async def get_current_admin_user(
     return current_user
 
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
     """Authenticate a user by email and password."""
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(STMT_USER_BY_EMAIL, {"email": email})
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    # bcrypt is CPU-bound - keep it off the event loop
+    if not await run_in_threadpool(verify_password, password, user.password_hash):
         return None
     return user
\ No newline at end of file
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional, List
@@ -6,9 +7,18 @@ import uvicorn
 from routers import auth, users, products, cart, orders
 from database import engine, Base
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create database tables
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield
+    await engine.dispose()
+
+
+# No default_response_class on purpose: routes with a response_model are
+# serialized straight to JSON bytes by Pydantic, which a custom class disables
 app = FastAPI(
     title="Practice E-Commerce API",
     description="A realistic e-commerce API for testing practice. Includes users, products, orders, and cart management.",
@@ -26,7 +36,8 @@ app = FastAPI(
             "url": "https://staging-api.example.com/v1",
             "description": "Staging server"
         }
-    ]
+    ],
+    lifespan=lifespan
 )
 
 # Include routers
@@ -38,7 +49,7 @@ app.include_router(orders.router, prefix="/orders", tags=["Orders"])
 
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {
         "message": "Welcome to Practice E-Commerce API",
         "version": "1.0.0",
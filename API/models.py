@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, JSON, UniqueConstraint, Index, func
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
@@ -22,8 +23,8 @@ class User(Base):
     updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
-    carts = relationship("Cart", back_populates="user", cascade="all, delete-orphan")
-    orders = relationship("Order", back_populates="user", cascade="all, delete-orphan")
+    carts = relationship("Cart", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    orders = relationship("Order", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class Product(Base):
@@ -42,29 +43,47 @@ class Product(Base):
     createdAt = Column(DateTime, default=datetime.utcnow)
     updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Indexes for the list_products filters
+    __table_args__ = (
+        Index("ix_products_category_price", category, price),
+        Index("ix_products_stock", stock),
+    )
+
     # Relationships
-    cart_items = relationship("CartItem", back_populates="product", cascade="all, delete-orphan")
+    cart_items = relationship("CartItem", back_populates="product", cascade="all, delete-orphan", passive_deletes=True)
     order_items = relationship("OrderItem", back_populates="product")
 
+    # rating is nullable - list sorting and cursors compare a missing rating as 0
+    @hybrid_property
+    def ratingSortKey(self):
+        return self.rating if self.rating is not None else 0.0
+
+    @ratingSortKey.expression
+    def ratingSortKey(cls):
+        return func.coalesce(cls.rating, 0.0)
+
 
 class Cart(Base):
     __tablename__ = "carts"
 
     id = Column(Integer, primary_key=True, index=True)
-    userId = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True)
+    userId = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True)
     updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     user = relationship("User", back_populates="carts")
-    items = relationship("CartItem", back_populates="cart", cascade="all, delete-orphan")
+    items = relationship("CartItem", back_populates="cart", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class CartItem(Base):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        UniqueConstraint("cartId", "productId", name="uq_cart_items_cart_product"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    cartId = Column(Integer, ForeignKey("carts.id"), nullable=False)
-    productId = Column(Integer, ForeignKey("products.id"), nullable=False)
+    cartId = Column(Integer, ForeignKey("carts.id", ondelete="CASCADE"), nullable=False)
+    productId = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
     quantity = Column(Integer, nullable=False, default=1)
 
     # Relationships
@@ -76,7 +95,7 @@ class Order(Base):
     __tablename__ = "orders"
 
     id = Column(Integer, primary_key=True, index=True)
-    userId = Column(Integer, ForeignKey("users.id"), nullable=False)
+    userId = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     shippingAddress = Column(JSON, nullable=False)
     paymentMethod = Column(String(50), nullable=False)
     status = Column(String(50), nullable=False, default="pending")
@@ -89,16 +108,22 @@ class Order(Base):
     createdAt = Column(DateTime, default=datetime.utcnow)
     updatedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Indexes for list_orders (newest first, id as tie-breaker, optionally by status)
+    __table_args__ = (
+        Index("ix_orders_user_created", userId, createdAt.desc(), id.desc()),
+        Index("ix_orders_user_status_created", userId, status, createdAt.desc(), id.desc()),
+    )
+
     # Relationships
     user = relationship("User", back_populates="orders")
-    items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+    items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    orderId = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    orderId = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False)
     productId = Column(Integer, ForeignKey("products.id"), nullable=False)
     productName = Column(String(200), nullable=False)
     price = Column(Float, nullable=False)
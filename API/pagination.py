@@ -0,0 +1,82 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(row: Any, columns: Sequence) -> str:
+    """Encode the sort key of the last row on a page as an opaque keyset cursor."""
+    values = [getattr(row, column.key) for column in columns]
+    payload = json.dumps(values, default=lambda value: value.isoformat(), separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> Tuple:
+    """Decode a cursor produced by encode_cursor for the same sort columns."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match the sort columns")
+        return tuple(
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+            for value, column in zip(values, columns)
+        )
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+async def count_rows(db: AsyncSession, stmt: Select) -> int:
+    """Count the rows a SELECT would return, ignoring its ordering."""
+    return await db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+
+
+async def _fetch_all(db: AsyncSession, stmt: Select) -> Sequence:
+    return (await db.scalars(stmt)).all()
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    key_columns: Sequence,
+    descending: bool,
+    page: int,
+    limit: int,
+    cursor: Optional[str],
+    fetch: Optional[Callable[[AsyncSession, Select], Awaitable[Sequence]]] = None
+) -> Tuple[Sequence, Optional[int], Optional[str]]:
+    """Fetch one page of a query in key order, by cursor when given or else by page number.
+    
+    Returns the page rows, the total row count (None on cursor pages) and the
+    cursor for the next page. Key columns must not be NULL, or the seek stops there.
+    fetch(db, stmt) loads the rows; by default they're read with db.scalars().
+    """
+    fetch = fetch or _fetch_all
+    query = query.order_by(*(column.desc() if descending else column.asc() for column in key_columns))
+    
+    if cursor:
+        # Keyset pagination: seek past the last row of the previous page
+        key, last = tuple_(*key_columns), decode_cursor(cursor, key_columns)
+        rows = await fetch(db, query.filter(key < last if descending else key > last).limit(limit + 1))
+        # No COUNT(*) - it would scan every matching row on each page, which
+        # is the cost cursors avoid, and a cursor page has no page number
+        total_items = None
+    else:
+        # Apply pagination (one extra row tells us whether another page exists)
+        offset = (page - 1) * limit
+        rows = await fetch(db, query.offset(offset).limit(limit + 1))
+        
+        # Get total count - skip COUNT(*) when this page already reaches the end
+        if len(rows) <= limit and (rows or page == 1):
+            total_items = offset + len(rows)
+        else:
+            total_items = await count_rows(db, query)
+    
+    next_cursor = encode_cursor(rows[limit - 1], key_columns) if len(rows) > limit else None
+    return rows[:limit], total_items, next_cursor
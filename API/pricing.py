@@ -0,0 +1,17 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+# Money is computed in Decimal and only turned back into float for storage/responses
+TWOPLACES = Decimal("0.01")
+TAX_RATE = Decimal("0.08")  # 8% tax rate
+FREE_SHIPPING_THRESHOLD = Decimal("100")  # Free shipping over $100
+SHIPPING_COST = Decimal("10.00")
+
+
+def to_decimal(value: float) -> Decimal:
+    """Convert a stored float amount to the Decimal it was entered as."""
+    return Decimal(str(value))
+
+
+def round_money(value: Decimal) -> Decimal:
+    """Round an amount to cents, half up."""
+    return value.quantize(TWOPLACES, rounding=ROUND_HALF_UP)
@@ -1,5 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
 from database import get_db
@@ -14,44 +17,63 @@ from auth import (
 
 router = APIRouter()
 
+# At most one row can match each of username and email
+STMT_EXISTING_USERNAME_OR_EMAIL = select(User.username, User.email).where(
+    or_(User.username == bindparam("username"), User.email == bindparam("email"))
+).limit(2)
+
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register_user(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register_user(user_data: UserRegister, db: AsyncSession = Depends(get_db)):
     """Register a new user account."""
+    # Check username and email in one round-trip
+    existing = (await db.execute(
+        STMT_EXISTING_USERNAME_OR_EMAIL,
+        {"username": user_data.username, "email": user_data.email}
+    )).all()
+    
     # Check if username already exists
-    if db.query(User).filter(User.username == user_data.username).first():
+    if any(row.username == user_data.username for row in existing):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Username already exists"
         )
     
     # Check if email already exists
-    if db.query(User).filter(User.email == user_data.email).first():
+    if existing:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Email already exists"
         )
     
-    # Create new user
+    # Create new user (bcrypt runs in the threadpool so it doesn't block the event loop)
     db_user = User(
         username=user_data.username,
         email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await run_in_threadpool(get_password_hash, user_data.password),
         firstName=user_data.firstName,
         lastName=user_data.lastName
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent registration; the unique indexes decide
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Username or email already exists"
+        )
+    await db.refresh(db_user)
     
-    return db_user
+    return UserResponse.from_orm_trusted(db_user)
 
 
 @router.post("/login", response_model=TokenResponse)
-def login_user(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login_user(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
     """Authenticate user and return JWT token."""
-    user = authenticate_user(db, user_data.email, user_data.password)
+    user = await authenticate_user(db, user_data.email, user_data.password)
     
     if not user:
         raise HTTPException(
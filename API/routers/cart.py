@@ -1,83 +1,113 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-
-from database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import bindparam, delete, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from database import get_db, strict_loading
 from models import Cart, CartItem, Product, User
-from schemas import AddToCart, UpdateCartItem, CartResponse, CartItemResponse
+from schemas import AddToCart, UpdateCartItem, CartResponse
 from auth import get_current_user
 
 router = APIRouter()
 
-
-def calculate_cart_totals(cart: Cart) -> dict:
-    """Calculate cart subtotal, tax, and total."""
-    subtotal = sum(item.quantity * item.product.price for item in cart.items)
-    tax = subtotal * 0.08  # 8% tax rate
-    total = subtotal + tax
-    
-    return {
-        "subtotal": round(subtotal, 2),
-        "tax": round(tax, 2),
-        "total": round(total, 2)
-    }
-
-
-def get_or_create_cart(db: Session, user_id: int) -> Cart:
+# INSERT constructs that support ON CONFLICT, by dialect name
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+STMT_CART_BY_USER = select(Cart).where(Cart.userId == bindparam("user_id"))
+# Items and their products are loaded up front so totals don't lazy-load per item
+STMT_CART_WITH_ITEMS_BY_USER = STMT_CART_BY_USER.options(
+    *strict_loading(selectinload(Cart.items).selectinload(CartItem.product))
+)
+STMT_CART_ITEM_IN_CART = select(CartItem).where(
+    CartItem.id == bindparam("item_id"),
+    CartItem.cartId == bindparam("cart_id")
+)
+STMT_CART_ITEM_BY_PRODUCT = select(CartItem).where(
+    CartItem.cartId == bindparam("cart_id"),
+    CartItem.productId == bindparam("product_id")
+)
+
+
+async def get_or_create_cart(db: AsyncSession, user_id: int, with_items: bool = True) -> Cart:
     """Get existing cart or create new one for user."""
-    cart = db.query(Cart).filter(Cart.userId == user_id).first()
+    query = STMT_CART_WITH_ITEMS_BY_USER if with_items else STMT_CART_BY_USER
+    cart = await db.scalar(query, {"user_id": user_id})
     
     if not cart:
-        cart = Cart(userId=user_id)
+        cart = Cart(userId=user_id, items=[])
         db.add(cart)
-        db.commit()
-        db.refresh(cart)
+        await db.commit()
     
     return cart
 
 
-@router.get("", response_model=CartResponse)
-def get_cart(
+async def get_cached_cart(
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+    db: AsyncSession = Depends(get_db)
+) -> Cart:
+    """Get the current user's cart with items, loading it at most once per request."""
+    cart = getattr(request.state, "cart", None)
+    if cart is None:
+        cart = await get_or_create_cart(db, current_user.id)
+        request.state.cart = cart
+    return cart
+
+
+async def upsert_cart_item(db: AsyncSession, cart: Cart, product: Product, quantity: int) -> CartItem:
+    """Insert a cart line for the product or add to its quantity, returning the current row."""
+    dialect = db.bind.dialect.name
+    values = {"cartId": cart.id, "productId": product.id, "quantity": quantity}
+    
+    if dialect in _UPSERT_INSERTS:
+        # Insert the item or add to its quantity in one atomic statement
+        upsert = _UPSERT_INSERTS[dialect](CartItem).values(**values)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[CartItem.cartId, CartItem.productId],
+            set_={"quantity": CartItem.quantity + upsert.excluded.quantity}
+        ).returning(CartItem)
+        return (await db.scalars(upsert, execution_options={"populate_existing": True})).one()
+    
+    if dialect == "mysql":
+        # MySQL has no RETURNING, so read the row back after the atomic upsert
+        upsert = mysql.insert(CartItem).values(**values)
+        await db.execute(upsert.on_duplicate_key_update(
+            quantity=CartItem.quantity + upsert.inserted.quantity
+        ))
+        return await db.scalar(
+            STMT_CART_ITEM_BY_PRODUCT,
+            {"cart_id": cart.id, "product_id": product.id},
+            execution_options={"populate_existing": True}
+        )
+    
+    # Other dialects: update the loaded line or add a new one
+    cart_item = next((item for item in cart.items if item.productId == product.id), None)
+    if cart_item:
+        cart_item.quantity += quantity
+    else:
+        cart_item = CartItem(productId=product.id, quantity=quantity, product=product)
+        cart.items.append(cart_item)
+    await db.flush()
+    return cart_item
+
+
+@router.get("", response_model=CartResponse)
+async def get_cart(cart: Cart = Depends(get_cached_cart)):
     """Retrieve the current user's shopping cart."""
-    cart = get_or_create_cart(db, current_user.id)
-    
-    # Calculate totals
-    totals = calculate_cart_totals(cart)
-    
-    # Build response with cart items
-    cart_items = []
-    for item in cart.items:
-        cart_items.append({
-            "id": item.id,
-            "productId": item.productId,
-            "productName": item.product.name,
-            "price": item.product.price,
-            "quantity": item.quantity,
-            "subtotal": round(item.quantity * item.product.price, 2)
-        })
-    
-    return {
-        "id": cart.id,
-        "userId": cart.userId,
-        "items": cart_items,
-        "subtotal": totals["subtotal"],
-        "tax": totals["tax"],
-        "total": totals["total"],
-        "updatedAt": cart.updatedAt
-    }
+    return CartResponse.from_orm_trusted(cart)
 
 
 @router.post("", response_model=CartResponse, status_code=status.HTTP_201_CREATED)
-def add_to_cart(
+async def add_to_cart(
     item_data: AddToCart,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cart: Cart = Depends(get_cached_cart),
+    db: AsyncSession = Depends(get_db)
 ):
     """Add a product to the shopping cart."""
-    # Check if product exists
-    product = db.query(Product).filter(Product.id == item_data.productId).first()
+    # Check if product exists (products already in the cart come from the identity map)
+    product = await db.get(Product, item_data.productId)
     
     if not product:
         raise HTTPException(
@@ -92,54 +122,37 @@ def add_to_cart(
             detail="Insufficient stock"
         )
     
-    # Get or create cart
-    cart = get_or_create_cart(db, current_user.id)
-    
-    # Check if item already in cart
-    existing_item = db.query(CartItem).filter(
-        CartItem.cartId == cart.id,
-        CartItem.productId == item_data.productId
-    ).first()
-    
-    if existing_item:
-        # Update quantity
-        new_quantity = existing_item.quantity + item_data.quantity
-        if product.stock < new_quantity:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Insufficient stock"
-            )
-        existing_item.quantity = new_quantity
-    else:
-        # Add new item
-        cart_item = CartItem(
-            cartId=cart.id,
-            productId=item_data.productId,
-            quantity=item_data.quantity
+    cart_item = await upsert_cart_item(db, cart, product, item_data.quantity)
+    
+    # Check stock against the combined quantity
+    if product.stock < cart_item.quantity:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Insufficient stock"
         )
-        db.add(cart_item)
     
-    db.commit()
-    db.refresh(cart)
+    # Keep the in-memory cart in step with the row just written
+    # (populate_existing resets the item's relationships, so re-attach its product)
+    set_committed_value(cart_item, "product", product)
+    if cart_item not in cart.items:
+        cart.items.append(cart_item)
+    
+    await db.commit()
     
     # Return updated cart
-    return get_cart(current_user, db)
+    return CartResponse.from_orm_trusted(cart)
 
 
 @router.put("/items/{itemId}", response_model=CartResponse)
-def update_cart_item(
+async def update_cart_item(
     itemId: int,
     item_data: UpdateCartItem,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cart: Cart = Depends(get_cached_cart),
+    db: AsyncSession = Depends(get_db)
 ):
     """Update the quantity of an item in the cart."""
-    cart = get_or_create_cart(db, current_user.id)
-    
-    cart_item = db.query(CartItem).filter(
-        CartItem.id == itemId,
-        CartItem.cartId == cart.id
-    ).first()
+    cart_item = next((item for item in cart.items if item.id == itemId), None)
     
     if not cart_item:
         raise HTTPException(
@@ -156,26 +169,23 @@ def update_cart_item(
         )
     
     cart_item.quantity = item_data.quantity
-    db.commit()
-    db.refresh(cart)
+    
+    await db.commit()
     
     # Return updated cart
-    return get_cart(current_user, db)
+    return CartResponse.from_orm_trusted(cart)
 
 
 @router.delete("/items/{itemId}", status_code=status.HTTP_204_NO_CONTENT)
-def remove_from_cart(
+async def remove_from_cart(
     itemId: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Remove a specific item from the cart."""
-    cart = get_or_create_cart(db, current_user.id)
+    cart = await get_or_create_cart(db, current_user.id, with_items=False)
     
-    cart_item = db.query(CartItem).filter(
-        CartItem.id == itemId,
-        CartItem.cartId == cart.id
-    ).first()
+    cart_item = await db.scalar(STMT_CART_ITEM_IN_CART, {"item_id": itemId, "cart_id": cart.id})
     
     if not cart_item:
         raise HTTPException(
@@ -183,22 +193,26 @@ def remove_from_cart(
             detail="Cart item not found"
         )
     
-    db.delete(cart_item)
-    db.commit()
+    await db.delete(cart_item)
+    await db.commit()
     
     return None
 
 
 @router.delete("", status_code=status.HTTP_204_NO_CONTENT)
-def clear_cart(
+async def clear_cart(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Remove all items from the cart."""
-    cart = get_or_create_cart(db, current_user.id)
-    
-    # Delete all cart items
-    db.query(CartItem).filter(CartItem.cartId == cart.id).delete()
-    db.commit()
+    cart = await get_or_create_cart(db, current_user.id, with_items=False)
+    
+    # Delete all cart items in one statement, skipping the session scan
+    await db.execute(
+        delete(CartItem).where(CartItem.cartId == cart.id),
+        execution_options={"synchronize_session": False}
+    )
+    db.expire(cart, ["items"])
+    await db.commit()
     
     return None
@@ -1,84 +1,110 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import bindparam, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import Optional
 from math import ceil
+from types import MappingProxyType
 
-from database import get_db
-from models import Order, OrderItem, Cart, CartItem, Product, User
+from database import get_db, strict_loading
+from models import Order, OrderItem, CartItem, Product, User
 from schemas import (
     CreateOrder,
     UpdateOrderStatus,
     OrderResponse,
     PaginatedOrders,
-    Pagination,
-    OrderStatusEnum
+    OrderStatus
 )
-from auth import get_current_user, get_current_admin_user
+from schemas_fast import orders_from_rows, PaginatedOrdersFast, PaginationFast, encode
+from auth import get_current_user, get_current_admin_user, is_admin
+from pagination import paginate
+from routers.products import invalidate_product_cache
+from routers.cart import STMT_CART_WITH_ITEMS_BY_USER
+from pricing import TAX_RATE, FREE_SHIPPING_THRESHOLD, SHIPPING_COST, to_decimal, round_money
 
 router = APIRouter()
 
+STMT_ORDER_WITH_ITEMS_BY_ID = (
+    select(Order)
+    .options(*strict_loading(selectinload(Order.items)))
+    .where(Order.id == bindparam("order_id"))
+)
+
+# Allowed order status transitions
+VALID_TRANSITIONS = MappingProxyType({
+    "pending": frozenset({"processing", "cancelled"}),
+    "processing": frozenset({"shipped", "cancelled"}),
+    "shipped": frozenset({"delivered"}),
+    "delivered": frozenset(),
+    "cancelled": frozenset()
+})
+
 
 def calculate_order_totals(items: list) -> dict:
     """Calculate order subtotal, tax, shipping, and total."""
-    subtotal = sum(item["quantity"] * item["price"] for item in items)
-    tax = subtotal * 0.08  # 8% tax rate
-    shipping_cost = 10.0 if subtotal < 100 else 0.0  # Free shipping over $100
-    total = subtotal + tax + shipping_cost
+    subtotal = to_decimal(0)
+    for item in items:
+        subtotal += to_decimal(item["price"]) * item["quantity"]
+    subtotal = round_money(subtotal)
+    tax = round_money(subtotal * TAX_RATE)
+    shipping_cost = SHIPPING_COST if subtotal < FREE_SHIPPING_THRESHOLD else to_decimal(0)
     
     return {
-        "subtotal": round(subtotal, 2),
-        "tax": round(tax, 2),
-        "shippingCost": round(shipping_cost, 2),
-        "total": round(total, 2)
+        "subtotal": float(subtotal),
+        "tax": float(tax),
+        "shippingCost": float(shipping_cost),
+        "total": float(subtotal + tax + shipping_cost)
     }
 
 
 @router.get("", response_model=PaginatedOrders)
-def list_orders(
-    status_filter: Optional[OrderStatusEnum] = Query(None, alias="status", description="Filter by order status"),
+async def list_orders(
+    status_filter: Optional[OrderStatus] = Query(None, alias="status", description="Filter by order status"),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(10, ge=1, le=50, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page's nextCursor; takes precedence over page"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all orders for the authenticated user."""
-    query = db.query(Order).filter(Order.userId == current_user.id)
+    query = (
+        select(Order)
+        .options(*strict_loading(selectinload(Order.items)))
+        .filter(Order.userId == current_user.id)
+    )
     
     # Apply status filter
     if status_filter:
-        query = query.filter(Order.status == status_filter.value)
+        query = query.filter(Order.status == status_filter)
     
-    # Order by creation date (newest first)
-    query = query.order_by(Order.createdAt.desc())
-    
-    # Get total count
-    total_items = query.count()
-    total_pages = ceil(total_items / limit)
-    
-    # Apply pagination
-    offset = (page - 1) * limit
-    orders = query.offset(offset).limit(limit).all()
+    # Order by creation date (newest first), id breaks ties so cursors are stable
+    orders, total_items, next_cursor = await paginate(
+        db, query, (Order.createdAt, Order.id), True, page, limit, cursor
+    )
+    total_pages = ceil(total_items / limit) if total_items is not None else None
     
-    return {
-        "data": orders,
-        "pagination": {
-            "page": page,
-            "limit": limit,
-            "totalPages": total_pages,
-            "totalItems": total_items
-        }
-    }
+    # Encode the page with msgspec - PaginatedOrders only documents the response
+    return Response(content=encode(PaginatedOrdersFast(
+        data=orders_from_rows(orders),
+        pagination=PaginationFast(
+            page=None if cursor else page,
+            limit=limit,
+            totalPages=total_pages,
+            totalItems=total_items,
+            nextCursor=next_cursor
+        )
+    )), media_type="application/json")
 
 
 @router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
-def create_order(
+async def create_order(
     order_data: CreateOrder,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Place a new order from the cart."""
     # Get user's cart
-    cart = db.query(Cart).filter(Cart.userId == current_user.id).first()
+    cart = await db.scalar(STMT_CART_WITH_ITEMS_BY_USER, {"user_id": current_user.id})
     
     if not cart or not cart.items:
         raise HTTPException(
@@ -108,55 +134,59 @@ def create_order(
     # Calculate totals
     totals = calculate_order_totals(order_items_data)
     
+    # Build all order items up front; the flush sends them as one batched INSERT
+    order_items = [
+        OrderItem(
+            productId=item_data["productId"],
+            productName=item_data["productName"],
+            price=item_data["price"],
+            quantity=item_data["quantity"],
+            subtotal=float(round_money(to_decimal(item_data["price"]) * item_data["quantity"]))
+        )
+        for item_data in order_items_data
+    ]
+    
     # Create order
     db_order = Order(
         userId=current_user.id,
         shippingAddress=order_data.shippingAddress.model_dump(),
-        paymentMethod=order_data.paymentMethod.value,
+        paymentMethod=order_data.paymentMethod,
         status="pending",
         subtotal=totals["subtotal"],
         tax=totals["tax"],
         shippingCost=totals["shippingCost"],
         total=totals["total"],
-        notes=order_data.notes
+        notes=order_data.notes,
+        items=order_items
     )
     
     db.add(db_order)
-    db.flush()  # Get order ID
     
-    # Create order items and update product stock
-    for item_data in order_items_data:
-        order_item = OrderItem(
-            orderId=db_order.id,
-            productId=item_data["productId"],
-            productName=item_data["productName"],
-            price=item_data["price"],
-            quantity=item_data["quantity"],
-            subtotal=round(item_data["price"] * item_data["quantity"], 2)
-        )
-        db.add(order_item)
-        
-        # Update product stock
-        product = db.query(Product).filter(Product.id == item_data["productId"]).first()
-        product.stock -= item_data["quantity"]
+    # Update product stock (products were loaded along with the cart)
+    for cart_item in cart.items:
+        cart_item.product.stock -= cart_item.quantity
     
-    # Clear cart
-    db.query(CartItem).filter(CartItem.cartId == cart.id).delete()
+    # Clear cart in one statement, skipping the session scan
+    await db.execute(
+        delete(CartItem).where(CartItem.cartId == cart.id),
+        execution_options={"synchronize_session": False}
+    )
+    db.expire(cart, ["items"])
     
-    db.commit()
-    db.refresh(db_order)
+    await db.commit()
+    invalidate_product_cache()
     
-    return db_order
+    return OrderResponse.from_orm_trusted(db_order)
 
 
 @router.get("/{orderId}", response_model=OrderResponse)
-def get_order_by_id(
+async def get_order_by_id(
     orderId: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Retrieve detailed order information."""
-    order = db.query(Order).filter(Order.id == orderId).first()
+    order = await db.scalar(STMT_ORDER_WITH_ITEMS_BY_ID, {"order_id": orderId})
     
     if not order:
         raise HTTPException(
@@ -165,24 +195,24 @@ def get_order_by_id(
         )
     
     # Users can only view their own orders unless they're admin
-    if order.userId != current_user.id and not current_user.is_admin:
+    if order.userId != current_user.id and not await is_admin(db, current_user):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view this order"
         )
     
-    return order
+    return OrderResponse.from_orm_trusted(order)
 
 
 @router.patch("/{orderId}", response_model=OrderResponse)
-def update_order_status(
+async def update_order_status(
     orderId: int,
     status_data: UpdateOrderStatus,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update the status of an order (Admin only)."""
-    order = db.query(Order).filter(Order.id == orderId).first()
+    order = await db.scalar(STMT_ORDER_WITH_ITEMS_BY_ID, {"order_id": orderId})
     
     if not order:
         raise HTTPException(
@@ -191,39 +221,30 @@ def update_order_status(
         )
     
     # Validate status transition
-    valid_transitions = {
-        "pending": ["processing", "cancelled"],
-        "processing": ["shipped", "cancelled"],
-        "shipped": ["delivered"],
-        "delivered": [],
-        "cancelled": []
-    }
-    
-    if status_data.status.value not in valid_transitions.get(order.status, []):
+    if status_data.status not in VALID_TRANSITIONS.get(order.status, frozenset()):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Cannot transition from {order.status} to {status_data.status.value}"
+            detail=f"Cannot transition from {order.status} to {status_data.status}"
         )
     
-    order.status = status_data.status.value
+    order.status = status_data.status
     
     if status_data.trackingNumber:
         order.trackingNumber = status_data.trackingNumber
     
-    db.commit()
-    db.refresh(order)
+    await db.commit()
     
-    return order
+    return OrderResponse.from_orm_trusted(order)
 
 
 @router.delete("/{orderId}", response_model=OrderResponse)
-def cancel_order(
+async def cancel_order(
     orderId: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Cancel an order (only if status is pending)."""
-    order = db.query(Order).filter(Order.id == orderId).first()
+    order = await db.scalar(STMT_ORDER_WITH_ITEMS_BY_ID, {"order_id": orderId})
     
     if not order:
         raise HTTPException(
@@ -232,7 +253,7 @@ def cancel_order(
         )
     
     # Users can only cancel their own orders unless they're admin
-    if order.userId != current_user.id and not current_user.is_admin:
+    if order.userId != current_user.id and not await is_admin(db, current_user):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to cancel this order"
@@ -245,14 +266,19 @@ def cancel_order(
             detail="Cannot cancel order in current status"
         )
     
-    # Restore product stock
+    # Restore product stock, loading every product in one query
+    product_ids = [item.productId for item in order.items]
+    products = {
+        product.id: product
+        for product in await db.scalars(select(Product).filter(Product.id.in_(product_ids)).with_for_update())
+    }
     for item in order.items:
-        product = db.query(Product).filter(Product.id == item.productId).first()
+        product = products.get(item.productId)
         if product:
             product.stock += item.quantity
     
     order.status = "cancelled"
-    db.commit()
-    db.refresh(order)
+    await db.commit()
+    invalidate_product_cache()
     
-    return order
+    return OrderResponse.from_orm_trusted(order)
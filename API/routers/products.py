@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+import threading
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from math import ceil
+from cachetools import TTLCache
 
 from database import get_db
 from models import Product, User
@@ -10,34 +13,84 @@ from schemas import (
     ProductUpdate,
     ProductResponse,
     PaginatedProducts,
-    Pagination,
-    CategoryEnum,
-    SortByEnum,
-    SortOrderEnum
+    Category,
+    SortBy,
+    SortOrder
 )
+from schemas_fast import products_from_rows, PaginatedProductsFast, PaginationFast, encode
 from auth import get_current_user, get_current_admin_user
+from pagination import paginate
 
 router = APIRouter()
 
+# Catalog reads are anonymous and change rarely - serve them from memory for a
+# short while and drop everything whenever a product (or its stock) changes
+PRODUCT_CACHE_TTL_SECONDS = 60
+_product_cache = TTLCache(maxsize=1024, ttl=PRODUCT_CACHE_TTL_SECONDS)
+_product_cache_lock = threading.Lock()
+
+
+def _cached_response(key):
+    with _product_cache_lock:
+        return _product_cache.get(key)
+
+
+def _cache_response(key, response):
+    with _product_cache_lock:
+        _product_cache[key] = response
+    return response
+
+
+def invalidate_product_cache():
+    """Drop all cached catalog responses after products are changed."""
+    with _product_cache_lock:
+        _product_cache.clear()
+
+
+STMT_PRODUCT_BY_ID = select(Product).where(Product.id == bindparam("product_id"))
+
+# Sort columns by sortBy value - rating sorts through its non-NULL key so cursors can seek past it
+PRODUCT_SORT_KEYS = {
+    "price": Product.price,
+    "name": Product.name,
+    "createdAt": Product.createdAt,
+    "rating": Product.ratingSortKey
+}
+
+# Page rows are fetched from the cursor in chunks of this size
+PRODUCT_FETCH_CHUNK_SIZE = 50
+
+
+async def _fetch_products(db: AsyncSession, query) -> list:
+    """Stream a page of products in chunks instead of buffering every raw row up front."""
+    result = await db.stream_scalars(query.execution_options(yield_per=PRODUCT_FETCH_CHUNK_SIZE))
+    return [product async for product in result]
+
 
 @router.get("", response_model=PaginatedProducts)
-def list_products(
+async def list_products(
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
-    category: Optional[CategoryEnum] = Query(None, description="Filter by category"),
+    category: Optional[Category] = Query(None, description="Filter by category"),
     minPrice: Optional[float] = Query(None, ge=0, description="Minimum price"),
     maxPrice: Optional[float] = Query(None, ge=0, description="Maximum price"),
     inStock: Optional[bool] = Query(None, description="Filter by stock availability"),
-    sortBy: Optional[SortByEnum] = Query(None, description="Sort field"),
-    sortOrder: SortOrderEnum = Query(SortOrderEnum.asc, description="Sort order"),
-    db: Session = Depends(get_db)
+    sortBy: Optional[SortBy] = Query(None, description="Sort field"),
+    sortOrder: SortOrder = Query("asc", description="Sort order"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page's nextCursor; takes precedence over page"),
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a paginated list of products with optional filters."""
-    query = db.query(Product)
+    cache_key = ("list", page, limit, category, minPrice, maxPrice, inStock, sortBy, sortOrder, cursor)
+    cached = _cached_response(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    
+    query = select(Product)
     
     # Apply filters
     if category:
-        query = query.filter(Product.category == category.value)
+        query = query.filter(Product.category == category)
     
     if minPrice is not None:
         query = query.filter(Product.price >= minPrice)
@@ -51,61 +104,61 @@ def list_products(
         else:
             query = query.filter(Product.stock == 0)
     
-    # Apply sorting
-    if sortBy:
-        sort_column = getattr(Product, sortBy.value)
-        if sortOrder == SortOrderEnum.desc:
-            query = query.order_by(sort_column.desc())
-        else:
-            query = query.order_by(sort_column.asc())
-    
-    # Get total count
-    total_items = query.count()
-    total_pages = ceil(total_items / limit)
-    
-    # Apply pagination
-    offset = (page - 1) * limit
-    products = query.offset(offset).limit(limit).all()
-    
-    return {
-        "data": products,
-        "pagination": {
-            "page": page,
-            "limit": limit,
-            "totalPages": total_pages,
-            "totalItems": total_items
-        }
-    }
+    # Apply sorting (id breaks ties so pages and cursors are deterministic)
+    key_columns = (PRODUCT_SORT_KEYS[sortBy], Product.id) if sortBy else (Product.id,)
+    descending = sortBy is not None and sortOrder == "desc"
+    products, total_items, next_cursor = await paginate(
+        db, query, key_columns, descending, page, limit, cursor, _fetch_products
+    )
+    total_pages = ceil(total_items / limit) if total_items is not None else None
+    
+    # Encode the page with msgspec - PaginatedProducts only documents the response
+    body = _cache_response(cache_key, encode(PaginatedProductsFast(
+        data=products_from_rows(products),
+        pagination=PaginationFast(
+            page=None if cursor else page,
+            limit=limit,
+            totalPages=total_pages,
+            totalItems=total_items,
+            nextCursor=next_cursor
+        )
+    )))
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
-def create_product(
+async def create_product(
     product_data: ProductCreate,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Add a new product to the catalog (Admin only)."""
     db_product = Product(
         name=product_data.name,
         description=product_data.description,
         price=product_data.price,
-        category=product_data.category.value,
+        category=product_data.category,
         stock=product_data.stock,
         images=product_data.images,
         tags=product_data.tags
     )
     
     db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
+    await db.commit()
+    await db.refresh(db_product)
+    invalidate_product_cache()
     
-    return db_product
+    return ProductResponse.from_orm_trusted(db_product)
 
 
 @router.get("/{productId}", response_model=ProductResponse)
-def get_product_by_id(productId: int, db: Session = Depends(get_db)):
+async def get_product_by_id(productId: int, db: AsyncSession = Depends(get_db)):
     """Retrieve detailed product information."""
-    product = db.query(Product).filter(Product.id == productId).first()
+    cached = _cached_response(("product", productId))
+    if cached is not None:
+        return cached
+    
+    product = await db.scalar(STMT_PRODUCT_BY_ID, {"product_id": productId})
     
     if not product:
         raise HTTPException(
@@ -113,18 +166,18 @@ def get_product_by_id(productId: int, db: Session = Depends(get_db)):
             detail="Product not found"
         )
     
-    return product
+    return _cache_response(("product", productId), ProductResponse.from_orm_trusted(product))
 
 
 @router.put("/{productId}", response_model=ProductResponse)
-def update_product(
+async def update_product(
     productId: int,
     product_data: ProductUpdate,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update product information (Admin only)."""
-    product = db.query(Product).filter(Product.id == productId).first()
+    product = await db.scalar(STMT_PRODUCT_BY_ID, {"product_id": productId})
     
     if not product:
         raise HTTPException(
@@ -142,20 +195,21 @@ def update_product(
     if product_data.stock is not None:
         product.stock = product_data.stock
     
-    db.commit()
-    db.refresh(product)
+    await db.commit()
+    await db.refresh(product)
+    invalidate_product_cache()
     
-    return product
+    return ProductResponse.from_orm_trusted(product)
 
 
 @router.delete("/{productId}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_product(
+async def delete_product(
     productId: int,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Remove a product from the catalog (Admin only)."""
-    product = db.query(Product).filter(Product.id == productId).first()
+    product = await db.scalar(STMT_PRODUCT_BY_ID, {"product_id": productId})
     
     if not product:
         raise HTTPException(
@@ -163,7 +217,8 @@ def delete_product(
             detail="Product not found"
         )
     
-    db.delete(product)
-    db.commit()
+    await db.delete(product)
+    await db.commit()
+    invalidate_product_cache()
     
     return None
@@ -1,22 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import get_db
 from models import User
 from schemas import UserResponse, UserUpdate
-from auth import get_current_user
+from auth import get_current_user, invalidate_cached_user, is_admin, STMT_USER_BY_ID
 
 router = APIRouter()
 
 
 @router.get("/{userId}", response_model=UserResponse)
-def get_user_by_id(
+async def get_user_by_id(
     userId: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Retrieve user details by user ID."""
-    user = db.query(User).filter(User.id == userId).first()
+    user = await db.scalar(STMT_USER_BY_ID, {"user_id": userId})
     
     if not user:
         raise HTTPException(
@@ -25,31 +25,31 @@ def get_user_by_id(
         )
     
     # Users can only view their own profile unless they're admin
-    if current_user.id != userId and not current_user.is_admin:
+    if current_user.id != userId and not await is_admin(db, current_user):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view this user"
         )
     
-    return user
+    return UserResponse.from_orm_trusted(user)
 
 
 @router.put("/{userId}", response_model=UserResponse)
-def update_user(
+async def update_user(
     userId: int,
     user_data: UserUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update user information."""
     # Users can only update their own profile unless they're admin
-    if current_user.id != userId and not current_user.is_admin:
+    if current_user.id != userId and not await is_admin(db, current_user):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to update this user"
         )
     
-    user = db.query(User).filter(User.id == userId).first()
+    user = await db.scalar(STMT_USER_BY_ID, {"user_id": userId})
     
     if not user:
         raise HTTPException(
@@ -67,27 +67,28 @@ def update_user(
     if user_data.address is not None:
         user.address = user_data.address.model_dump()
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    invalidate_cached_user(userId)
     
-    return user
+    return UserResponse.from_orm_trusted(user)
 
 
 @router.delete("/{userId}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(
+async def delete_user(
     userId: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a user account."""
     # Users can only delete their own account unless they're admin
-    if current_user.id != userId and not current_user.is_admin:
+    if current_user.id != userId and not await is_admin(db, current_user):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to delete this user"
         )
     
-    user = db.query(User).filter(User.id == userId).first()
+    user = await db.scalar(STMT_USER_BY_ID, {"user_id": userId})
     
     if not user:
         raise HTTPException(
@@ -95,7 +96,8 @@ def delete_user(
             detail="User not found"
         )
     
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
+    invalidate_cached_user(userId)
     
     return None
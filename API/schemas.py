@@ -1,10 +1,62 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional, List
+import re
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, computed_field, field_validator, validate_email
+from typing import Any, Callable, Literal, Optional, List
 from datetime import datetime
+from decimal import Decimal
 from enum import Enum
+from functools import cached_property
 
+from pricing import TAX_RATE, to_decimal, round_money
 
-# Enums
+# Validation patterns, compiled once at import
+_ZIP_RE = re.compile(r"^[0-9]{5}(-[0-9]{4})?$")
+_PHONE_RE = re.compile(r"^\+?[1-9]\d{1,14}$")
+_USERNAME_RE = re.compile(r"^[a-zA-Z0-9_]+$")
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def _check_pattern(pattern: re.Pattern, value: Optional[str]) -> Optional[str]:
+    """Reject a string that doesn't fully match a precompiled pattern (no trailing newline)."""
+    if value is not None and not pattern.fullmatch(value):
+        raise ValueError(f"String should match pattern '{pattern.pattern}'")
+    return value
+
+
+# Response and nested schemas build their validators on first use rather than
+# at import. Request bodies are left eager - FastAPI builds them while
+# registering routes anyway, and deferring them there only triggers warnings.
+_BASE_CONFIG = ConfigDict(defer_build=True)
+
+
+def _with_example(config: Optional[ConfigDict] = None, /, **example: Any) -> ConfigDict:
+    """Attach one schema-level OpenAPI example, optionally on top of a shared config."""
+    return ConfigDict(**(config or {}), json_schema_extra={"examples": [example]})
+
+
+def _compile_builder(cls: type) -> Callable[[Any], Any]:
+    """Generate a straight-line constructor that fills a flat model from a trusted row."""
+    fields = tuple(cls.model_fields)
+    values = ", ".join(f"{name!r}: row.{name}" for name in fields)
+    source = (
+        "def build(row):\n"
+        "    instance = new(cls)\n"
+        f"    setattr(instance, '__dict__', {{{values}}})\n"
+        "    setattr(instance, '__pydantic_fields_set__', set(fields))\n"
+        "    setattr(instance, '__pydantic_extra__', None)\n"
+        "    setattr(instance, '__pydantic_private__', None)\n"
+        "    return instance\n"
+    )
+    namespace = {"new": object.__new__, "setattr": object.__setattr__, "cls": cls, "fields": fields}
+    exec(source, namespace)
+    return namespace["build"]
+
+
+class _OrmBase(BaseModel):
+    """Shared base for responses built from ORM rows - read-only once built."""
+    model_config = ConfigDict(from_attributes=True, defer_build=True, frozen=True)
+
+
+# Enums - kept as named constants; schemas validate against the Literal aliases below
 class CategoryEnum(str, Enum):
     electronics = "electronics"
     clothing = "clothing"
@@ -40,65 +92,158 @@ class SortOrderEnum(str, Enum):
     desc = "desc"
 
 
+# Inbound string choices - validated as plain str literals, no Enum coercion.
+# Response schemas carry the stored strings as str.
+Category = Literal["electronics", "clothing", "books", "home", "toys"]
+PaymentMethod = Literal["credit_card", "debit_card", "paypal", "cash_on_delivery"]
+OrderStatus = Literal["pending", "processing", "shipped", "delivered", "cancelled"]
+SortBy = Literal["price", "name", "createdAt", "rating"]
+SortOrder = Literal["asc", "desc"]
+
+
 # Address Schema
 class Address(BaseModel):
-    street: str = Field(..., example="123 Main St")
-    apartment: Optional[str] = Field(None, example="Apt 4B")
-    city: str = Field(..., example="New York")
-    state: str = Field(..., example="NY")
-    zipCode: str = Field(..., pattern=r"^[0-9]{5}(-[0-9]{4})?$", example="10001")
-    country: str = Field(..., example="USA")
+    model_config = _with_example(
+        _BASE_CONFIG,
+        street="123 Main St",
+        apartment="Apt 4B",
+        city="New York",
+        state="NY",
+        zipCode="10001",
+        country="USA"
+    )
+
+    street: str
+    apartment: Optional[str] = None
+    city: str
+    state: str
+    zipCode: str = Field(..., json_schema_extra={"pattern": _ZIP_RE.pattern})
+    country: str
+
+    @field_validator("zipCode")
+    @classmethod
+    def check_zip_code(cls, v: str) -> str:
+        return _check_pattern(_ZIP_RE, v)
 
 
 # User Schemas
 class UserRegister(BaseModel):
-    username: str = Field(..., min_length=3, max_length=30, pattern=r"^[a-zA-Z0-9_]+$", example="john_doe")
-    email: EmailStr = Field(..., example="john@example.com")
-    password: str = Field(..., min_length=8, max_length=100, example="SecurePass123!")
-    firstName: Optional[str] = Field(None, max_length=50, example="John")
-    lastName: Optional[str] = Field(None, max_length=50, example="Doe")
+    model_config = _with_example(
+        username="john_doe",
+        email="john@example.com",
+        password="SecurePass123!",
+        firstName="John",
+        lastName="Doe"
+    )
+
+    username: str = Field(..., min_length=3, max_length=30, json_schema_extra={"pattern": _USERNAME_RE.pattern})
+    # Same check as EmailStr, but email-validator is only imported on first registration
+    email: str = Field(..., json_schema_extra={"format": "email"})
+    password: str = Field(..., min_length=8, max_length=100)
+    firstName: Optional[str] = Field(None, max_length=50)
+    lastName: Optional[str] = Field(None, max_length=50)
 
+    @field_validator("username")
+    @classmethod
+    def check_username(cls, v: str) -> str:
+        return _check_pattern(_USERNAME_RE, v)
 
-class UserLogin(BaseModel):
-    email: EmailStr = Field(..., example="john@example.com")
-    password: str = Field(..., example="SecurePass123!")
+    @field_validator("email")
+    @classmethod
+    def check_email(cls, v: str) -> str:
+        return validate_email(v)[1]
 
 
-class UserResponse(BaseModel):
-    id: int = Field(..., example=123)
-    username: str = Field(..., example="john_doe")
-    email: str = Field(..., example="john@example.com")
-    firstName: Optional[str] = Field(None, example="John")
-    lastName: Optional[str] = Field(None, example="Doe")
-    phone: Optional[str] = Field(None, example="+1234567890")
+class UserLogin(BaseModel):
+    model_config = _with_example(
+        email="john@example.com",
+        password="SecurePass123!"
+    )
+
+    # Login only looks the address up, so a cheap shape check replaces EmailStr
+    email: str = Field(..., json_schema_extra={"format": "email"})
+    password: str
+
+    @field_validator("email")
+    @classmethod
+    def check_email(cls, v: str) -> str:
+        _check_pattern(_EMAIL_RE, v)
+        # Lowercase the domain only, as registration's email normalization does
+        local, _, domain = v.rpartition("@")
+        return f"{local}@{domain.lower()}"
+
+
+class UserResponse(_OrmBase):
+    model_config = _with_example(
+        id=123,
+        username="john_doe",
+        email="john@example.com",
+        firstName="John",
+        lastName="Doe",
+        phone="+1234567890",
+        createdAt="2024-01-15T10:30:00",
+        updatedAt="2024-01-15T10:30:00"
+    )
+
+    id: int
+    username: str
+    email: str
+    firstName: Optional[str] = None
+    lastName: Optional[str] = None
+    phone: Optional[str] = None
     address: Optional[Address] = None
     createdAt: datetime
     updatedAt: datetime
 
-    class Config:
-        from_attributes = True
+    @classmethod
+    def from_orm_trusted(cls, user: Any) -> "UserResponse":
+        """Build from a loaded User row without re-validating it."""
+        values = {name: getattr(user, name) for name in cls.model_fields}
+        if values["address"] is not None:
+            values["address"] = Address.model_construct(**values["address"])
+        return cls.model_construct(**values)
 
 
 class UserUpdate(BaseModel):
     firstName: Optional[str] = Field(None, max_length=50)
     lastName: Optional[str] = Field(None, max_length=50)
-    phone: Optional[str] = Field(None, pattern=r"^\+?[1-9]\d{1,14}$")
+    phone: Optional[str] = Field(None, json_schema_extra={"pattern": _PHONE_RE.pattern})
     address: Optional[Address] = None
 
+    @field_validator("phone")
+    @classmethod
+    def check_phone(cls, v: Optional[str]) -> Optional[str]:
+        return _check_pattern(_PHONE_RE, v)
+
 
 class TokenResponse(BaseModel):
-    token: str = Field(..., example="eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...")
-    refreshToken: str = Field(..., example="refresh_token_here")
-    expiresIn: int = Field(..., example=3600)
+    model_config = _with_example(
+        _BASE_CONFIG,
+        token="eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
+        refreshToken="refresh_token_here",
+        expiresIn=3600
+    )
+
+    token: str
+    refreshToken: str
+    expiresIn: int
 
 
 # Product Schemas
 class ProductCreate(BaseModel):
-    name: str = Field(..., min_length=3, max_length=200, example="Wireless Headphones")
-    description: Optional[str] = Field(None, max_length=2000, example="High-quality wireless headphones with noise cancellation")
-    price: float = Field(..., gt=0, example=99.99)
-    category: CategoryEnum = Field(..., example="electronics")
-    stock: int = Field(..., ge=0, example=50)
+    model_config = _with_example(
+        name="Wireless Headphones",
+        description="High-quality wireless headphones with noise cancellation",
+        price=99.99,
+        category="electronics",
+        stock=50
+    )
+
+    name: str = Field(..., min_length=3, max_length=200)
+    description: Optional[str] = Field(None, max_length=2000)
+    price: float = Field(..., gt=0)
+    category: Category
+    stock: int = Field(..., ge=0)
     images: Optional[List[str]] = Field(None, max_items=10)
     tags: Optional[List[str]] = Field(None, max_items=20)
 
@@ -110,72 +255,180 @@ class ProductUpdate(BaseModel):
     stock: Optional[int] = Field(None, ge=0)
 
 
-class ProductResponse(BaseModel):
-    id: int = Field(..., example=456)
-    name: str = Field(..., example="Wireless Headphones")
-    description: Optional[str] = Field(None, example="High-quality wireless headphones")
-    price: float = Field(..., example=99.99)
-    category: str = Field(..., example="electronics")
-    stock: int = Field(..., example=50)
+class ProductResponse(_OrmBase):
+    model_config = _with_example(
+        id=456,
+        name="Wireless Headphones",
+        description="High-quality wireless headphones",
+        price=99.99,
+        category="electronics",
+        stock=50,
+        images=["https://example.com/images/headphones.jpg"],
+        tags=["audio", "wireless"],
+        rating=4.5,
+        reviewCount=120,
+        createdAt="2024-01-15T10:30:00",
+        updatedAt="2024-01-15T10:30:00"
+    )
+
+    id: int
+    name: str
+    description: Optional[str] = None
+    price: float
+    category: str
+    stock: int
     images: Optional[List[str]] = None
     tags: Optional[List[str]] = None
-    rating: Optional[float] = Field(None, ge=0, le=5, example=4.5)
-    reviewCount: int = Field(default=0, example=120)
+    rating: Optional[float] = None
+    reviewCount: int = 0
     createdAt: datetime
     updatedAt: datetime
 
-    class Config:
-        from_attributes = True
+    @classmethod
+    def from_orm_trusted(cls, product: Any) -> "ProductResponse":
+        """Build from a loaded Product row without re-validating it."""
+        return _BUILDERS[cls](product)
+
+
+# Generated once at import; only for trusted rows loaded from the database
+_BUILDERS = {ProductResponse: _compile_builder(ProductResponse)}
 
 
 # Cart Schemas
 class AddToCart(BaseModel):
-    productId: int = Field(..., ge=1, example=456)
-    quantity: int = Field(..., ge=1, le=100, example=2)
+    model_config = _with_example(
+        productId=456,
+        quantity=2
+    )
+
+    productId: int = Field(..., ge=1)
+    quantity: int = Field(..., ge=1, le=100)
 
 
 class UpdateCartItem(BaseModel):
     quantity: int = Field(..., ge=1, le=100)
 
 
-class CartItemResponse(BaseModel):
-    id: int = Field(..., example=1)
-    productId: int = Field(..., example=456)
-    productName: str = Field(..., example="Wireless Headphones")
-    price: float = Field(..., example=99.99)
-    quantity: int = Field(..., example=3)
-    subtotal: float = Field(..., example=299.97)
-
-    class Config:
-        from_attributes = True
+class CartItemResponse(_OrmBase):
+    model_config = _with_example(
+        id=1,
+        productId=456,
+        quantity=3,
+        productName="Wireless Headphones",
+        price=99.99,
+        subtotal=299.97
+    )
 
+    id: int
+    productId: int
+    quantity: int
+    product: Any = Field(..., exclude=True)  # Loaded Product row, read by the computed fields
+
+    @computed_field
+    @property
+    def productName(self) -> str:
+        return self.product.name
+
+    @computed_field
+    @property
+    def price(self) -> float:
+        return self.product.price
+
+    @computed_field
+    @property
+    def subtotal(self) -> float:
+        return float(round_money(to_decimal(self.product.price) * self.quantity))
+
+
+# Item lists are read from their rows in one pydantic-core call per response
+_CART_ITEMS_ADAPTER = TypeAdapter(List[CartItemResponse], config=_BASE_CONFIG)
+
+
+class CartResponse(_OrmBase):
+    model_config = _with_example(
+        id=1,
+        userId=123,
+        items=[{
+            "id": 1,
+            "productId": 456,
+            "quantity": 3,
+            "productName": "Wireless Headphones",
+            "price": 99.99,
+            "subtotal": 299.97
+        }],
+        updatedAt="2024-01-15T10:30:00",
+        subtotal=299.97,
+        tax=24.00,
+        total=323.97
+    )
 
-class CartResponse(BaseModel):
-    id: int = Field(..., example=1)
-    userId: int = Field(..., example=123)
+    id: int
+    userId: int
     items: List[CartItemResponse] = []
-    subtotal: float = Field(..., example=299.97)
-    tax: float = Field(..., example=24.00)
-    total: float = Field(..., example=323.97)
     updatedAt: datetime
 
-    class Config:
-        from_attributes = True
+    @classmethod
+    def from_orm_trusted(cls, cart: Any) -> "CartResponse":
+        """Build from a loaded Cart row (with items); only the item list goes through a validator."""
+        return cls.model_construct(
+            id=cart.id,
+            userId=cart.userId,
+            items=_CART_ITEMS_ADAPTER.validate_python(cart.items, from_attributes=True),
+            updatedAt=cart.updatedAt
+        )
+
+    @cached_property
+    def _subtotal(self) -> Decimal:
+        subtotal = to_decimal(0)
+        for item in self.items:
+            subtotal += to_decimal(item.product.price) * item.quantity
+        return round_money(subtotal)
+
+    @computed_field
+    @property
+    def subtotal(self) -> float:
+        return float(self._subtotal)
+
+    @cached_property
+    def _tax(self) -> Decimal:
+        return round_money(self._subtotal * TAX_RATE)
+
+    @computed_field
+    @property
+    def tax(self) -> float:
+        return float(self._tax)
+
+    @computed_field
+    @property
+    def total(self) -> float:
+        return float(self._subtotal + self._tax)
 
 
 # Order Schemas
 class CreateOrder(BaseModel):
+    model_config = _with_example(
+        shippingAddress={
+            "street": "123 Main St",
+            "apartment": "Apt 4B",
+            "city": "New York",
+            "state": "NY",
+            "zipCode": "10001",
+            "country": "USA"
+        },
+        paymentMethod="credit_card"
+    )
+
     shippingAddress: Address
-    paymentMethod: PaymentMethodEnum = Field(..., example="credit_card")
+    paymentMethod: PaymentMethod
     notes: Optional[str] = Field(None, max_length=500)
 
 
 class UpdateOrderStatus(BaseModel):
-    status: OrderStatusEnum
+    status: OrderStatus
     trackingNumber: Optional[str] = Field(None, max_length=100)
 
 
-class OrderItemResponse(BaseModel):
+class OrderItemResponse(_OrmBase):
     id: int
     productId: int
     productName: str
@@ -183,51 +436,108 @@ class OrderItemResponse(BaseModel):
     quantity: int
     subtotal: float
 
-    class Config:
-        from_attributes = True
 
+_ORDER_ITEMS_ADAPTER = TypeAdapter(List[OrderItemResponse], config=_BASE_CONFIG)
+
+
+class OrderResponse(_OrmBase):
+    model_config = _with_example(
+        id=789,
+        userId=123,
+        items=[{
+            "id": 1,
+            "productId": 456,
+            "productName": "Wireless Headphones",
+            "price": 99.99,
+            "quantity": 3,
+            "subtotal": 299.97
+        }],
+        shippingAddress={
+            "street": "123 Main St",
+            "apartment": "Apt 4B",
+            "city": "New York",
+            "state": "NY",
+            "zipCode": "10001",
+            "country": "USA"
+        },
+        paymentMethod="credit_card",
+        status="processing",
+        subtotal=299.97,
+        tax=24.00,
+        shippingCost=10.00,
+        total=333.97,
+        trackingNumber="TRACK123456",
+        createdAt="2024-01-15T10:30:00",
+        updatedAt="2024-01-15T10:30:00"
+    )
 
-class OrderResponse(BaseModel):
-    id: int = Field(..., example=789)
-    userId: int = Field(..., example=123)
+    id: int
+    userId: int
     items: List[OrderItemResponse] = []
     shippingAddress: Address
-    paymentMethod: str = Field(..., example="credit_card")
-    status: str = Field(..., example="processing")
-    subtotal: float = Field(..., example=299.97)
-    tax: float = Field(..., example=24.00)
-    shippingCost: float = Field(..., example=10.00)
-    total: float = Field(..., example=333.97)
-    trackingNumber: Optional[str] = Field(None, example="TRACK123456")
+    paymentMethod: str
+    status: str
+    subtotal: float
+    tax: float
+    shippingCost: float
+    total: float
+    trackingNumber: Optional[str] = None
     notes: Optional[str] = None
     createdAt: datetime
     updatedAt: datetime
 
-    class Config:
-        from_attributes = True
+    @classmethod
+    def from_orm_trusted(cls, order: Any) -> "OrderResponse":
+        """Build from a loaded Order row (with items); only the item list goes through a validator."""
+        values = {name: getattr(order, name) for name in cls.model_fields}
+        values["items"] = _ORDER_ITEMS_ADAPTER.validate_python(order.items, from_attributes=True)
+        values["shippingAddress"] = Address.model_construct(**order.shippingAddress)
+        return cls.model_construct(**values)
 
 
-# Pagination Schema
+# Pagination Schema - documents the envelope; list routes build schemas_fast.PaginationFast
 class Pagination(BaseModel):
-    page: int = Field(..., example=1)
-    limit: int = Field(..., example=20)
-    totalPages: int = Field(..., example=5)
-    totalItems: int = Field(..., example=97)
+    model_config = _with_example(
+        _BASE_CONFIG,
+        page=1,
+        limit=20,
+        totalPages=5,
+        totalItems=97,
+        nextCursor="WyIyMDI0LTAxLTE1VDEwOjMwOjAwIiw0Ml0="
+    )
+
+    # page and the totals are null on cursor pages, which skip the COUNT(*)
+    page: Optional[int]
+    limit: int
+    totalPages: Optional[int]
+    totalItems: Optional[int]
+    nextCursor: Optional[str] = None
 
 
 class PaginatedProducts(BaseModel):
+    model_config = _BASE_CONFIG
+
     data: List[ProductResponse]
     pagination: Pagination
 
 
 class PaginatedOrders(BaseModel):
+    model_config = _BASE_CONFIG
+
     data: List[OrderResponse]
     pagination: Pagination
 
 
 # Error Schema
 class ErrorResponse(BaseModel):
-    error: str = Field(..., example="Invalid input")
-    message: str = Field(..., example="The email field is required")
-    code: str = Field(..., example="VALIDATION_ERROR")
-    details: Optional[dict] = None
+    model_config = _with_example(
+        _BASE_CONFIG,
+        error="Invalid input",
+        message="The email field is required",
+        code="VALIDATION_ERROR"
+    )
+
+    error: str
+    message: str
+    code: str
+    details: Any = None  # Passed through as-is - no recursive dict validation
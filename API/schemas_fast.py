@@ -0,0 +1,96 @@
+import msgspec
+from typing import Any, Optional, List, Sequence
+from datetime import datetime
+
+# Serialization-only mirrors of the list response schemas. Pydantic in
+# schemas.py still validates input and documents the API; these are only used
+# to encode large list payloads and must keep the same field names and order.
+
+# Shared encoder - reused so msgspec doesn't set up a new one per response
+encode = msgspec.json.Encoder().encode
+
+
+# Structs are slotted (no per-instance __dict__). Leaf records are also frozen
+# and hold only scalars or lists of strings, so they can't form reference
+# cycles and skip GC tracking.
+class AddressFast(msgspec.Struct, kw_only=True, frozen=True, gc=False):
+    street: str
+    apartment: Optional[str] = None
+    city: str
+    state: str
+    zipCode: str
+    country: str
+
+
+class ProductResponseFast(msgspec.Struct, frozen=True, gc=False):
+    id: int
+    name: str
+    description: Optional[str]
+    price: float
+    category: str
+    stock: int
+    images: Optional[List[str]]
+    tags: Optional[List[str]]
+    rating: Optional[float]
+    reviewCount: int
+    createdAt: datetime
+    updatedAt: datetime
+
+
+class OrderItemResponseFast(msgspec.Struct, frozen=True, gc=False):
+    id: int
+    productId: int
+    productName: str
+    price: float
+    quantity: int
+    subtotal: float
+
+
+class OrderResponseFast(msgspec.Struct):
+    id: int
+    userId: int
+    items: List[OrderItemResponseFast]
+    shippingAddress: AddressFast
+    paymentMethod: str
+    status: str
+    subtotal: float
+    tax: float
+    shippingCost: float
+    total: float
+    trackingNumber: Optional[str]
+    notes: Optional[str]
+    createdAt: datetime
+    updatedAt: datetime
+
+
+class PaginationFast(msgspec.Struct, frozen=True, gc=False):
+    page: Optional[int]
+    limit: int
+    totalPages: Optional[int]
+    totalItems: Optional[int]
+    nextCursor: Optional[str]
+
+
+class PaginatedProductsFast(msgspec.Struct):
+    data: List[ProductResponseFast]
+    pagination: PaginationFast
+
+
+class PaginatedOrdersFast(msgspec.Struct):
+    data: List[OrderResponseFast]
+    pagination: PaginationFast
+
+
+# List types built once and converted from ORM rows in a single msgspec pass
+_PRODUCT_LIST = List[ProductResponseFast]
+_ORDER_LIST = List[OrderResponseFast]
+
+
+def products_from_rows(products: Sequence[Any]) -> List[ProductResponseFast]:
+    """Build product structs from loaded Product rows."""
+    return msgspec.convert(products, _PRODUCT_LIST, from_attributes=True)
+
+
+def orders_from_rows(orders: Sequence[Any]) -> List[OrderResponseFast]:
+    """Build order structs from loaded Order rows (with items)."""
+    return msgspec.convert(orders, _ORDER_LIST, from_attributes=True)
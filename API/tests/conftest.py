@@ -0,0 +1,63 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+from sqlalchemy import event
+
+# The API uses flat imports (from database import ...), so put API/ on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Loader options are built at import, so turn strict loading on before the app
+# is imported - any relationship a route didn't eager-load then raises
+os.environ.setdefault("STRICT_LOADING", "1")
+
+
+@pytest.fixture(scope="session")
+def client(tmp_path_factory):
+    """Test client for the app, backed by a fresh SQLite database in a temp directory."""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("db"))
+    from fastapi.testclient import TestClient
+    import main
+    with TestClient(main.app) as test_client:
+        yield test_client
+    os.chdir(cwd)
+
+
+@pytest.fixture(scope="session")
+def admin_headers(client):
+    """Auth headers for a registered user promoted to admin."""
+    user = {"username": "admin_user", "email": "admin@example.com", "password": "SecurePass123!"}
+    response = client.post("/auth/register", json=user)
+    assert response.status_code == 201, response.text
+    
+    # Admins are promoted directly in the database (see README)
+    with sqlite3.connect("ecommerce.db") as conn:
+        conn.execute("UPDATE users SET is_admin = 1 WHERE id = ?", (response.json()["id"],))
+    
+    response = client.post("/auth/login", json={"email": user["email"], "password": user["password"]})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+@pytest.fixture
+def query_counter():
+    """List of SQL statements executed while the test runs."""
+    import database
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(database.engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(database.engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def cold_user_cache():
+    """Start the test with no cached users, so each request looks its user up."""
+    import auth
+    with auth._user_cache_lock:
+        auth._user_cache.clear()
@@ -0,0 +1,26 @@
+import sqlite3
+
+PRODUCT = {"name": "Auth Product", "price": 5.0, "category": "books", "stock": 1}
+
+
+def set_admin(user_id, admin):
+    with sqlite3.connect("ecommerce.db") as conn:
+        conn.execute("UPDATE users SET is_admin = ? WHERE id = ?", (admin, user_id))
+
+
+def test_demoted_admin_loses_access_while_user_is_cached(client):
+    user = {"username": "demoted_admin", "email": "demoted@example.com", "password": "SecurePass123!"}
+    response = client.post("/auth/register", json=user)
+    assert response.status_code == 201, response.text
+    user_id = response.json()["id"]
+    set_admin(user_id, True)
+    
+    response = client.post("/auth/login", json={"email": user["email"], "password": user["password"]})
+    headers = {"Authorization": f"Bearer {response.json()['token']}"}
+    assert client.post("/products", headers=headers, json=PRODUCT).status_code == 201
+    
+    # The user row is now cached, but is_admin is still read from the database
+    set_admin(user_id, False)
+    response = client.post("/products", headers=headers, json=PRODUCT)
+    
+    assert response.status_code == 403, response.text
@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+PAGE_LIMIT = 2
+# Price range only the products made here fall into
+MIN_PRICE = 9000
+
+
+@pytest.fixture(scope="module")
+def rated_product_ids(client, admin_headers):
+    """Ids of five products rated 3.0, 4.5, none, 2.0 and none."""
+    product_ids = []
+    for i in range(5):
+        response = client.post(
+            "/products",
+            headers=admin_headers,
+            json={"name": f"Paged Product {i}", "price": MIN_PRICE + i, "category": "books", "stock": 1}
+        )
+        assert response.status_code == 201, response.text
+        product_ids.append(response.json()["id"])
+    
+    # The API never writes NULL ratings, so set them directly
+    with sqlite3.connect("ecommerce.db") as conn:
+        for product_id, rating in zip(product_ids, (3.0, 4.5, None, 2.0, None)):
+            conn.execute("UPDATE products SET rating = ? WHERE id = ?", (rating, product_id))
+    
+    from routers.products import invalidate_product_cache
+    invalidate_product_cache()
+    return product_ids
+
+
+def walk_pages(client, params):
+    """Follow nextCursor from the first page, returning the pages' JSON bodies."""
+    params = {**params, "minPrice": MIN_PRICE, "limit": PAGE_LIMIT}
+    pages = [client.get("/products", params=params).json()]
+    while pages[-1]["pagination"]["nextCursor"]:
+        response = client.get("/products", params={**params, "cursor": pages[-1]["pagination"]["nextCursor"]})
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+    return pages
+
+
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+def test_cursor_walks_past_null_ratings(client, rated_product_ids, sort_order):
+    pages = walk_pages(client, {"sortBy": "rating", "sortOrder": sort_order})
+    
+    # Missing ratings sort as 0, ids break ties
+    by_rating = [rated_product_ids[i] for i in (2, 4, 3, 0, 1)]
+    expected = by_rating if sort_order == "asc" else by_rating[::-1]
+    assert [product["id"] for page in pages for product in page["data"]] == expected
+
+
+def test_cursor_pages_skip_totals(client, rated_product_ids):
+    first, *rest = walk_pages(client, {})
+    
+    assert first["pagination"]["page"] == 1
+    assert first["pagination"]["totalItems"] == 5
+    assert rest
+    for page in rest:
+        assert page["pagination"]["page"] is None
+        assert page["pagination"]["totalItems"] is None
+        assert page["pagination"]["totalPages"] is None
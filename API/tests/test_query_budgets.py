@@ -0,0 +1,50 @@
+import pytest
+
+# Queries per request, including the lookup of the caller's user
+GET_CART_BUDGET = 4
+LIST_ORDERS_BUDGET = 3
+
+
+@pytest.fixture(scope="module")
+def shopper(client, admin_headers):
+    """Admin with two products in the cart and one placed order."""
+    product_ids = []
+    for i in range(2):
+        response = client.post(
+            "/products",
+            headers=admin_headers,
+            json={"name": f"Budget Product {i}", "price": 10.5 + i, "category": "books", "stock": 10}
+        )
+        assert response.status_code == 201, response.text
+        product_ids.append(response.json()["id"])
+    
+    def fill_cart():
+        for product_id in product_ids:
+            response = client.post("/cart", headers=admin_headers, json={"productId": product_id, "quantity": 2})
+            assert response.status_code == 201, response.text
+    
+    fill_cart()
+    response = client.post("/orders", headers=admin_headers, json={
+        "shippingAddress": {"street": "123 Main St", "city": "New York", "state": "NY", "zipCode": "10001", "country": "USA"},
+        "paymentMethod": "credit_card"
+    })
+    assert response.status_code == 201, response.text
+    fill_cart()
+    return admin_headers
+
+
+def test_get_cart_query_budget(client, shopper, cold_user_cache, query_counter):
+    response = client.get("/cart", headers=shopper)
+    
+    assert response.status_code == 200, response.text
+    assert len(response.json()["items"]) == 2
+    assert len(query_counter) <= GET_CART_BUDGET, query_counter
+
+
+def test_list_orders_query_budget(client, shopper, cold_user_cache, query_counter):
+    response = client.get("/orders", headers=shopper)
+    
+    assert response.status_code == 200, response.text
+    assert len(response.json()["data"]) == 1
+    assert len(response.json()["data"][0]["items"]) == 2
+    assert len(query_counter) <= LIST_ORDERS_BUDGET, query_counter
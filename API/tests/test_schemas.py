@@ -0,0 +1,27 @@
+import pytest
+from pydantic import ValidationError
+
+from schemas import Address, UserLogin, UserRegister, UserUpdate
+
+ADDRESS = {"street": "123 Main St", "city": "New York", "state": "NY", "zipCode": "10001", "country": "USA"}
+
+
+def test_patterns_accept_valid_values():
+    assert UserRegister(username="john_doe", email="john@example.com", password="SecurePass123!").username == "john_doe"
+    assert Address(**ADDRESS).zipCode == "10001"
+    assert UserUpdate(phone="+1234567").phone == "+1234567"
+
+
+@pytest.mark.parametrize("build", [
+    lambda: UserRegister(username="john_doe\n", email="john@example.com", password="SecurePass123!"),
+    lambda: Address(**{**ADDRESS, "zipCode": "12345\n"}),
+    lambda: UserUpdate(phone="+1234567\n"),
+    lambda: UserLogin(email="a@b.co\n", password="SecurePass123!"),
+])
+def test_patterns_reject_trailing_newline(build):
+    with pytest.raises(ValidationError):
+        build()
+
+
+def test_login_email_lowercases_domain_only():
+    assert UserLogin(email="Jo.Hn@Example.COM", password="x").email == "Jo.Hn@example.com"